@@ -1,9 +1,22 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 import uvicorn
 from pdd_app.api import (model_pdd, user, auth,
                          exams, question, category, admin)
 
-pdd_app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    batcher = asyncio.create_task(model_pdd.batcher_loop())
+    yield
+    batcher.cancel()
+
+
+pdd_app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
 pdd_app.include_router(model_pdd.pdd_router)
 pdd_app.include_router(user.user_router)
 pdd_app.include_router(admin.admin_router)
@@ -16,5 +29,8 @@ pdd_app.include_router(category.category_router)
 
 
 
+# В продакшене: gunicorn main:pdd_app -k uvicorn.workers.UvicornWorker -w $(nproc) -b 127.0.0.1:8011
 if __name__ == '__main__':
-    uvicorn.run(pdd_app, host='127.0.0.1', port=8011)
\ No newline at end of file
+    # loop='auto' берёт uvloop, если он установлен (на Windows его нет)
+    uvicorn.run('main:pdd_app', host='127.0.0.1', port=8011,
+                loop='auto', http='httptools', workers=os.cpu_count())
@@ -0,0 +1,30 @@
+"""question.updated_at for ETag
+
+Revision ID: 0b6e4c2f8a13
+Revises: a9c3f1e4d7b0
+Create Date: 2026-10-15 19:12:27.630418
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b6e4c2f8a13'
+down_revision: Union[str, None] = 'a9c3f1e4d7b0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('question', sa.Column(
+        'updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False
+    ))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('question', 'updated_at')
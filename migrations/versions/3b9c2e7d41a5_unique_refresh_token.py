@@ -0,0 +1,33 @@
+"""unique index on refresh_token.token
+
+Revision ID: 3b9c2e7d41a5
+Revises: f6448802dabc
+Create Date: 2026-10-15 10:12:40.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9c2e7d41a5'
+down_revision: Union[str, None] = 'f6448802dabc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # До появления jti два входа в одну секунду давали одинаковый токен
+    op.execute(
+        'DELETE FROM refresh_token a USING refresh_token b '
+        'WHERE a.token = b.token AND a.id > b.id'
+    )
+    op.create_index(op.f('ix_refresh_token_token'), 'refresh_token', ['token'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_refresh_token_token'), table_name='refresh_token')
@@ -0,0 +1,41 @@
+"""Pdd_model.images as varchar[]
+
+Revision ID: 5f0b8e2d9c47
+Revises: e7a1d0c5b862
+Create Date: 2026-10-15 17:30:52.418663
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f0b8e2d9c47'
+down_revision: Union[str, None] = 'e7a1d0c5b862'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column(
+        'Pdd_model', 'images',
+        type_=postgresql.ARRAY(sa.String()),
+        existing_type=sa.String(),
+        existing_nullable=False,
+        postgresql_using="string_to_array(images, ',')"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column(
+        'Pdd_model', 'images',
+        type_=sa.String(),
+        existing_type=postgresql.ARRAY(sa.String()),
+        existing_nullable=False,
+        postgresql_using="array_to_string(images, ',')"
+    )
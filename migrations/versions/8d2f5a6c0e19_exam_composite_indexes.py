@@ -0,0 +1,37 @@
+"""composite indexes on exam and exam_answer
+
+Revision ID: 8d2f5a6c0e19
+Revises: 3b9c2e7d41a5
+Create Date: 2026-10-15 14:03:11.529310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2f5a6c0e19'
+down_revision: Union[str, None] = '3b9c2e7d41a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_exam_user_status', 'exam', ['user_id', 'status'], unique=False)
+    op.create_index('ix_exam_user_started', 'exam', ['user_id', 'started_at'], unique=False)
+    # Гонка параллельных ответов могла оставить дубли, оставляем первый
+    op.execute(
+        'DELETE FROM exam_answer a USING exam_answer b '
+        'WHERE a.exam_id = b.exam_id AND a.question_id = b.question_id AND a.id > b.id'
+    )
+    op.create_index('ix_exam_answer_exam_question', 'exam_answer', ['exam_id', 'question_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_exam_answer_exam_question', table_name='exam_answer')
+    op.drop_index('ix_exam_user_started', table_name='exam')
+    op.drop_index('ix_exam_user_status', table_name='exam')
@@ -0,0 +1,55 @@
+"""store enums as varchar + check instead of native postgres enum
+
+Revision ID: a9c3f1e4d7b0
+Revises: 5f0b8e2d9c47
+Create Date: 2026-10-15 18:05:36.902154
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9c3f1e4d7b0'
+down_revision: Union[str, None] = '5f0b8e2d9c47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (таблица, колонка, имя типа / CHECK, значения)
+ENUMS = [
+    ('user', 'role', 'rolechoices', ('admin', 'user')),
+    ('question', 'difficulty', 'difficultychoices', ('easy', 'medium', 'advanced')),
+    ('exam', 'status', 'examstatuschoices', ('in_progress', 'completed', 'failed')),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column, name, values in ENUMS:
+        op.alter_column(
+            table, column,
+            type_=sa.String(length=16),
+            existing_type=postgresql.ENUM(*values, name=name),
+            existing_nullable=False,
+            postgresql_using=f'"{column}"::text'
+        )
+        op.execute(f'DROP TYPE {name}')
+        op.create_check_constraint(name, table, sa.column(column).in_(values))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, column, name, values in ENUMS:
+        op.drop_constraint(name, table, type_='check')
+        postgresql.ENUM(*values, name=name).create(op.get_bind())
+        op.alter_column(
+            table, column,
+            type_=postgresql.ENUM(*values, name=name),
+            existing_type=sa.String(length=16),
+            existing_nullable=False,
+            postgresql_using=f'"{column}"::{name}'
+        )
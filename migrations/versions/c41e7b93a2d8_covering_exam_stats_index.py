@@ -0,0 +1,33 @@
+"""covering exam stats index, question category/created index
+
+Revision ID: c41e7b93a2d8
+Revises: 8d2f5a6c0e19
+Create Date: 2026-10-15 15:21:47.104382
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41e7b93a2d8'
+down_revision: Union[str, None] = '8d2f5a6c0e19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index('ix_exam_user_status', table_name='exam')
+    op.create_index('ix_exam_user_status_score', 'exam', ['user_id', 'status'], unique=False,
+                    postgresql_include=['score'])
+    op.create_index('ix_question_category_created', 'question', ['category_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_question_category_created', table_name='question')
+    op.drop_index('ix_exam_user_status_score', table_name='exam')
+    op.create_index('ix_exam_user_status', 'exam', ['user_id', 'status'], unique=False)
@@ -0,0 +1,59 @@
+"""timestamptz columns with server-side now() defaults
+
+Revision ID: e7a1d0c5b862
+Revises: c41e7b93a2d8
+Create Date: 2026-10-15 16:48:05.771920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a1d0c5b862'
+down_revision: Union[str, None] = 'c41e7b93a2d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (таблица, колонка, нужен ли server_default now())
+COLUMNS = [
+    ('user', 'created_at', True),
+    ('refresh_token', 'created_date', True),
+    ('question', 'created_at', True),
+    ('exam', 'started_at', True),
+    ('exam', 'finished_at', False),
+    ('exam_answer', 'answered_at', True),
+    ('video', 'created_at', True),
+    ('comment', 'created_at', True),
+    ('like', 'created_at', True),
+    ('favorite', 'created_at', True),
+    ('ai_prediction_log', 'created_at', True),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Старые значения писались через datetime.utcnow(), т.е. это UTC без зоны
+    for table, column, has_default in COLUMNS:
+        op.alter_column(
+            table, column,
+            type_=sa.DateTime(timezone=True),
+            existing_type=sa.DateTime(),
+            server_default=sa.text('now()') if has_default else None,
+            postgresql_using=f'"{column}" AT TIME ZONE \'UTC\''
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, column, has_default in COLUMNS:
+        op.alter_column(
+            table, column,
+            type_=sa.DateTime(),
+            existing_type=sa.DateTime(timezone=True),
+            server_default=None,
+            postgresql_using=f'"{column}" AT TIME ZONE \'UTC\''
+        )
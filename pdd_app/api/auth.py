@@ -2,11 +2,21 @@ from fastapi import (
     HTTPException, Depends, APIRouter, status
 )
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from redis.exceptions import RedisError
 from datetime import datetime, timedelta
 from typing import Optional
+import hashlib
+import time
+import uuid
 import jwt
-from passlib.context import CryptContext
+import orjson
+from cryptography.hazmat.primitives.serialization import (
+    load_pem_private_key, load_pem_public_key
+)
 
 from pdd_app.db.models import User, RefreshToken, RoleChoices
 from pdd_app.db.schema import (
@@ -14,9 +24,12 @@ from pdd_app.db.schema import (
     UserRegisterResponseSchema, RefreshTokenRequestSchema,
     AccessTokenSchema, LogoutResponseSchema
 )
-from pdd_app.db.database import SessionLocal
+from pdd_app.db.database import get_db
+from pdd_app.db.cache import redis_client
+from pdd_app.security.passwords import pwd_context, hash_password, verify_password
 from pdd_app.config import (
-    SECRET_KEY,
+    SECRET_KEY_PATH,
+    PUBLIC_KEY_PATH,
     ALGORITHM,
     ACCESS_TOKEN_EXPIRE_MINUTES,
     REFRESH_TOKEN_EXPIRE_DAYS
@@ -26,32 +39,18 @@ from pdd_app.config import (
 # ================= SECURITY =================
 
 security = HTTPBearer()
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 
 auth_router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
-# ================= DB =================
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
-# ================= PASSWORD =================
-
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
-
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+# ================= JWT =================
 
+# Ключи разбираются один раз при старте, а не на каждый encode/decode
+with open(SECRET_KEY_PATH, 'rb') as f:
+    PRIVATE_KEY = load_pem_private_key(f.read(), password=None)
+with open(PUBLIC_KEY_PATH, 'rb') as f:
+    PUBLIC_KEY = load_pem_public_key(f.read())
 
-# ================= JWT =================
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
@@ -59,19 +58,20 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     )
     to_encode.update({"exp": expire, "type": "access"})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    return jwt.encode(to_encode, PRIVATE_KEY, algorithm=ALGORITHM)
 
 
 def create_refresh_token(data: dict) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire, "type": "refresh"})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    # jti делает токен уникальным даже при нескольких входах в одну секунду
+    to_encode.update({"exp": expire, "type": "refresh", "jti": uuid.uuid4().hex})
+    return jwt.encode(to_encode, PRIVATE_KEY, algorithm=ALGORITHM)
 
 
 def decode_token(token: str) -> dict:
     try:
-        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        return jwt.decode(token, PUBLIC_KEY, algorithms=[ALGORITHM])
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Токен истек")
     except jwt.PyJWTError:
@@ -87,27 +87,29 @@ def decode_token(token: str) -> dict:
 )
 async def register(
     user_data: UserCreateSchema,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    if db.query(User).filter(User.email == user_data.email).first():
-        raise HTTPException(409, "Email already exists")
-
-    if db.query(User).filter(User.username == user_data.username).first():
-        raise HTTPException(409, "Username already exists")
-
     user = User(
         email=user_data.email,
         username=user_data.username,
-        password=hash_password(user_data.password),
-        role=RoleChoices.user,
-        created_at=datetime.utcnow()
+        password=await hash_password(user_data.password),
+        role=RoleChoices.user
     )
 
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Уникальность email/username гарантирует БД, здесь только выбираем сообщение
+        await db.rollback()
+        email_taken = (await db.execute(
+            select(User.id).where(User.email == user_data.email)
+        )).first()
+        if email_taken:
+            raise HTTPException(409, "Email already exists")
+        raise HTTPException(409, "Username already exists")
 
-    return user
+    return UserRegisterResponseSchema.from_orm_fast(user)
 
 
 # ================= LOGIN =================
@@ -115,13 +117,18 @@ async def register(
 @auth_router.post("/login", response_model=TokenSchema)
 async def login(
     login_data: UserLoginSchema,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    user = db.query(User).filter(User.email == login_data.email).first()
+    user = (await db.execute(
+        select(User).where(User.email == login_data.email)
+    )).scalar_one_or_none()
 
-    if not user or not verify_password(login_data.password, user.password):
+    if not user or not await verify_password(login_data.password, user.password):
         raise HTTPException(401, "Неверный email или пароль")
 
+    if pwd_context.needs_update(user.password):
+        user.password = await hash_password(login_data.password)
+
     access_token = create_access_token(
         {"sub": str(user.id), "email": user.email}
     )
@@ -131,10 +138,9 @@ async def login(
 
     db.add(RefreshToken(
         user_id=user.id,
-        token=refresh_token,
-        created_date=datetime.utcnow()
+        token=refresh_token
     ))
-    db.commit()
+    await db.commit()
 
     return TokenSchema(
         access_token=access_token,
@@ -148,7 +154,7 @@ async def login(
 @auth_router.post("/refresh", response_model=AccessTokenSchema)
 async def refresh_token(
     data: RefreshTokenRequestSchema,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     payload = decode_token(data.refresh_token)
 
@@ -157,15 +163,17 @@ async def refresh_token(
 
     user_id = int(payload["sub"])
 
-    token_in_db = db.query(RefreshToken).filter(
-        RefreshToken.token == data.refresh_token,
-        RefreshToken.user_id == user_id
-    ).first()
+    token_in_db = (await db.execute(
+        select(RefreshToken).where(
+            RefreshToken.token == data.refresh_token,
+            RefreshToken.user_id == user_id
+        )
+    )).scalar_one_or_none()
 
     if not token_in_db:
         raise HTTPException(401, "Токен отозван")
 
-    user = db.query(User).get(user_id)
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(404, "Пользователь не найден")
 
@@ -181,35 +189,111 @@ async def refresh_token(
 @auth_router.post("/logout", response_model=LogoutResponseSchema)
 async def logout(
     data: RefreshTokenRequestSchema,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    token = db.query(RefreshToken).filter(
-        RefreshToken.token == data.refresh_token
-    ).first()
+    token = (await db.execute(
+        select(RefreshToken).where(RefreshToken.token == data.refresh_token)
+    )).scalar_one_or_none()
 
     if token:
-        db.delete(token)
-        db.commit()
+        await db.delete(token)
+        await db.commit()
+        await invalidate_user_cache(token.user_id)
 
     return {"message": "Logout success"}
 
 
+# ================= USER CACHE =================
+
+USER_CACHE_TTL_SECONDS = 60
+
+
+def _user_cache_key(token: str) -> str:
+    return "u:" + hashlib.blake2b(token.encode(), digest_size=16).hexdigest()
+
+
+def _user_cache_index_key(user_id: int) -> str:
+    return f"u:idx:{user_id}"
+
+
+async def _get_cached_user(token: str, db: AsyncSession) -> Optional[User]:
+    try:
+        cached = await redis_client.get(_user_cache_key(token))
+    except RedisError:
+        return None
+    if cached is None:
+        return None
+
+    data = orjson.loads(cached)
+    user = User(
+        id=data["id"],
+        email=data["email"],
+        username=data["username"],
+        role=RoleChoices(data["role"]),
+        created_at=datetime.fromisoformat(data["created_at"])
+    )
+    # Присоединяем к сессии как уже загруженный объект, без запроса в БД
+    make_transient_to_detached(user)
+    return await db.merge(user, load=False)
+
+
+async def _cache_user(token: str, user: User, expires_at: int) -> None:
+    ttl = min(USER_CACHE_TTL_SECONDS, int(expires_at - time.time()))
+    if ttl <= 0:
+        return
+
+    key = _user_cache_key(token)
+    index_key = _user_cache_index_key(user.id)
+    value = orjson.dumps({
+        "id": user.id,
+        "email": user.email,
+        "username": user.username,
+        "role": user.role,
+        "created_at": user.created_at
+    })
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.set(key, value, ex=ttl)
+            pipe.sadd(index_key, key)
+            pipe.expire(index_key, ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+            await pipe.execute()
+    except RedisError:
+        pass
+
+
+async def invalidate_user_cache(user_id: int) -> None:
+    """Сбросить закешированного пользователя для всех его access-токенов"""
+    index_key = _user_cache_index_key(user_id)
+    try:
+        keys = await redis_client.smembers(index_key)
+        await redis_client.delete(index_key, *keys)
+    except RedisError:
+        pass
+
+
 # ================= CURRENT USER =================
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> User:
     token = credentials.credentials
+
+    # TTL кеша не превышает срок жизни токена, поэтому повторная проверка подписи не нужна
+    user = await _get_cached_user(token, db)
+    if user is not None:
+        return user
+
     payload = decode_token(token)
 
     if payload.get("type") != "access":
         raise HTTPException(401, "Неверный тип токена")
 
-    user = db.query(User).get(int(payload["sub"]))
+    user = await db.get(User, int(payload["sub"]))
     if not user:
         raise HTTPException(404, "Пользователь не найден")
 
+    await _cache_user(token, user, payload["exp"])
     return user
 
 
@@ -219,5 +303,8 @@ async def get_current_admin(
     current_user: User = Depends(get_current_user)
 ) -> User:
     if current_user.role != RoleChoices.admin:
-        raise HTTPException(403, "Доступ запрещен")
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Доступ запрещен. Требуются права администратора."
+        )
     return current_user
\ No newline at end of file
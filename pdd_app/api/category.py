@@ -1,69 +1,64 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import time
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 
-from pdd_app.db.models import Category, User, RoleChoices
+from pdd_app.db.models import Category, User
 from ..db.schema import CategoryCreateSchema, CategoryUpdateSchema, CategorySchema
-from ..db.database import SessionLocal
-from .auth import get_current_user
+from ..db.database import get_db
+from .auth import get_current_admin
+from .question import question_cascade_loads
 
 category_router = APIRouter(prefix='/categories', tags=['Categories'])
 
 
-async def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
-def check_admin_role(current_user: User):
-    """Проверка прав администратора"""
-    if current_user.role != RoleChoices.admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail='Доступ запрещен. Требуются права администратора.'
-        )
+# Готовый JSON списка категорий по (limit, offset). Каждый воркер держит свою копию,
+# поэтому кроме сброса при изменениях записи живут не дольше CATEGORY_CACHE_TTL_SECONDS
+CATEGORY_CACHE_TTL_SECONDS = 60
+CATEGORY_CACHE_MAX_KEYS = 256
+_cat_cache: dict[tuple[int, int], tuple[float, bytes]] = {}
 
 
 @category_router.post('/', status_code=status.HTTP_201_CREATED, response_model=CategorySchema)
 async def create_category(
         category_data: CategoryCreateSchema,
-        current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        current_user: User = Depends(get_current_admin),
+        db: AsyncSession = Depends(get_db)
 ):
     """
     Создать новую категорию (только для администраторов)
 
     - **category_name**: Название категории
     """
-    check_admin_role(current_user)
-
-    # Проверяем уникальность
-    existing = db.query(Category).filter(Category.category_name == category_data.category_name).first()
-    if existing:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail='Категория с таким названием уже существует'
-        )
-
     new_category = Category(
         category_name=category_data.category_name
     )
     db.add(new_category)
-    db.commit()
-    db.refresh(new_category)
+    # Уникальность названия проверяет уникальный индекс в БД
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail='Категория с таким названием уже существует'
+        )
+    _cat_cache.clear()
 
-    return new_category
+    return CategorySchema.from_orm_fast(new_category)
 
 
 @category_router.get('/', response_model=List[CategorySchema])
 async def get_categories(
         limit: int = 20,
         offset: int = 0,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ):
     """
     Получить список категорий
@@ -71,35 +66,47 @@ async def get_categories(
     - **limit**: Количество результатов
     - **offset**: Смещение для пагинации
     """
-    categories = db.query(Category).order_by(Category.id.asc()).offset(offset).limit(limit).all()
-    return categories
+    key = (limit, offset)
+    cached = _cat_cache.get(key)
+    if cached and cached[0] > time.monotonic():
+        return Response(content=cached[1], media_type='application/json')
+
+    categories = (await db.execute(
+        select(Category).order_by(Category.id.asc()).offset(offset).limit(limit)
+    )).scalars().all()
+    content = orjson.dumps([CategorySchema.from_orm_fast(c).model_dump() for c in categories])
+
+    if len(_cat_cache) >= CATEGORY_CACHE_MAX_KEYS:
+        _cat_cache.clear()
+    _cat_cache[key] = (time.monotonic() + CATEGORY_CACHE_TTL_SECONDS, content)
+    return Response(content=content, media_type='application/json')
 
 
 @category_router.get('/{category_id}', response_model=CategorySchema)
 async def get_category_detail(
         category_id: int,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ):
     """
     Получить детальную информацию о категории
 
     - **category_id**: ID категории
     """
-    category = db.query(Category).filter(Category.id == category_id).first()
+    category = await db.get(Category, category_id)
     if not category:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail='Категория не найдена'
         )
-    return category
+    return CategorySchema.from_orm_fast(category)
 
 
 @category_router.put('/{category_id}', response_model=CategorySchema)
 async def update_category(
         category_id: int,
         category_data: CategoryUpdateSchema,
-        current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        current_user: User = Depends(get_current_admin),
+        db: AsyncSession = Depends(get_db)
 ):
     """
     Обновить категорию (только для администраторов)
@@ -107,54 +114,54 @@ async def update_category(
     - **category_id**: ID категории
     - **category_name**: Новое название категории
     """
-    check_admin_role(current_user)
-
-    category = db.query(Category).filter(Category.id == category_id).first()
+    category = await db.get(Category, category_id)
     if not category:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail='Категория не найдена'
         )
 
-    # Проверка уникальности нового названия
     if category_data.category_name:
-        existing = db.query(Category).filter(
-            Category.category_name == category_data.category_name,
-            Category.id != category_id
-        ).first()
-        if existing:
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail='Категория с таким названием уже существует'
-            )
         category.category_name = category_data.category_name
 
-    db.commit()
-    db.refresh(category)
-    return category
+    # Уникальность нового названия проверяет уникальный индекс в БД
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail='Категория с таким названием уже существует'
+        )
+    _cat_cache.clear()
+    return CategorySchema.from_orm_fast(category)
 
 
 @category_router.delete('/{category_id}', status_code=status.HTTP_200_OK)
 async def delete_category(
         category_id: int,
-        current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        current_user: User = Depends(get_current_admin),
+        db: AsyncSession = Depends(get_db)
 ):
     """
     Удалить категорию (только для администраторов)
 
     - **category_id**: ID категории
     """
-    check_admin_role(current_user)
-
-    category = db.query(Category).filter(Category.id == category_id).first()
+    # Вопросы категории и их зависимые записи удаляются каскадом — грузим их заранее
+    category_questions = selectinload(Category.category_questions)
+    category = await db.get(
+        Category, category_id,
+        options=[category_questions, *question_cascade_loads(category_questions)]
+    )
     if not category:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail='Категория не найдена'
         )
 
-    db.delete(category)
-    db.commit()
+    await db.delete(category)
+    await db.commit()
+    _cat_cache.clear()
 
     return {"message": "Категория успешно удалена", "category_id": category_id}
\ No newline at end of file
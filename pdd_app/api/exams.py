@@ -1,20 +1,22 @@
-from fastapi import HTTPException, Depends, APIRouter, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+import orjson
+from fastapi import HTTPException, Depends, APIRouter, Response, status
+from sqlalchemy import func, select, update, and_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
-import random
 from pdd_app.db.models import (
     Exam, ExamAnswer, Question, AnswerOption,
     ExamStatusChoices, User
 )
 from ..db.schema import (
     ExamSchema, ExamStartResponseSchema, ExamAnswerRequestSchema,
-    ExamAnswerResponseSchema, ExamFinishResponseSchema,
-    QuestionSchema, QuestionOptionSchema
+    ExamAnswerResponseSchema, ExamFinishResponseSchema
 )
-from ..db.database import SessionLocal
+from ..db.database import get_db
 from .auth import get_current_user
+from .user import invalidate_exam_stats
 
 exam_router = APIRouter(prefix='/exams', tags=['Exams'])
 
@@ -22,19 +24,29 @@ exam_router = APIRouter(prefix='/exams', tags=['Exams'])
 EXAM_QUESTIONS_COUNT = 20
 PASSING_SCORE = 18  # Минимум правильных ответов для прохождения
 
+# Готовый JSON вопросов по (id, updated_at). Правка вопроса меняет updated_at,
+# поэтому устаревшая запись просто перестаёт запрашиваться; у каждого воркера своя копия
+QUESTION_JSON_CACHE_MAX_KEYS = 4096
+_question_json_cache: dict[tuple[int, datetime], bytes] = {}
 
-async def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+
+def _question_json(question: Question) -> bytes:
+    """Готовый JSON вопроса в формате QuestionSchema (варианты уже загружены)"""
+    return orjson.dumps({
+        'id': str(question.id),
+        'text': question.text,
+        'image': question.image,
+        'options': [
+            {'id': str(opt.id), 'text': opt.text}
+            for opt in question.question_options
+        ]
+    })
 
 
 @exam_router.post('/start', response_model=ExamStartResponseSchema, status_code=status.HTTP_201_CREATED)
 async def start_exam(
         current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ):
     """
     Начать новый экзамен
@@ -44,10 +56,12 @@ async def start_exam(
     - Возвращает ID экзамена и список вопросов
     """
     # Проверяем, есть ли у пользователя незавершенный экзамен
-    existing_exam = db.query(Exam).filter(
-        Exam.user_id == current_user.id,
-        Exam.status == ExamStatusChoices.in_progress
-    ).first()
+    existing_exam = (await db.execute(
+        select(Exam).where(
+            Exam.user_id == current_user.id,
+            Exam.status == ExamStatusChoices.in_progress
+        )
+    )).scalars().first()
 
     if existing_exam:
         raise HTTPException(
@@ -55,49 +69,65 @@ async def start_exam(
             detail='У вас уже есть активный экзамен. Завершите его перед началом нового.'
         )
 
-    # Получаем все вопросы
-    all_questions = db.query(Question).all()
+    # Выбираем 20 случайных вопросов на стороне БД — только id и версию
+    selected_questions = (await db.execute(
+        select(Question.id, Question.updated_at)
+        .order_by(func.random())
+        .limit(EXAM_QUESTIONS_COUNT)
+    )).all()
 
-    if len(all_questions) < EXAM_QUESTIONS_COUNT:
+    # Если вернулось меньше вопросов, чем нужно, значит их недостаточно в базе
+    if len(selected_questions) < EXAM_QUESTIONS_COUNT:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f'Недостаточно вопросов для экзамена. Требуется минимум {EXAM_QUESTIONS_COUNT} вопросов.'
         )
 
-    # Выбираем 20 случайных вопросов
-    selected_questions = random.sample(all_questions, EXAM_QUESTIONS_COUNT)
+    # Вопросы с вариантами грузятся только для тех, кого нет в кеше
+    question_parts = {
+        row.id: _question_json_cache.get((row.id, row.updated_at))
+        for row in selected_questions
+    }
+    missing_ids = [question_id for question_id, part in question_parts.items() if part is None]
+    if missing_ids:
+        questions = (await db.execute(
+            select(Question)
+            .options(selectinload(Question.question_options))
+            .where(Question.id.in_(missing_ids))
+        )).scalars().all()
+
+        if len(_question_json_cache) + len(questions) > QUESTION_JSON_CACHE_MAX_KEYS:
+            _question_json_cache.clear()
+        for question in questions:
+            part = _question_json(question)
+            question_parts[question.id] = part
+            _question_json_cache[(question.id, question.updated_at)] = part
 
     # Создаем новый экзамен
     new_exam = Exam(
         user_id=current_user.id,
         status=ExamStatusChoices.in_progress,
-        started_at=datetime.utcnow(),
         score=0
     )
 
     db.add(new_exam)
-    db.commit()
-    db.refresh(new_exam)
-
-    # Формируем список вопросов для ответа
-    questions_response = []
-    for question in selected_questions:
-        questions_response.append(QuestionSchema(
-            id=str(question.id),
-            text=question.text,
-            image=question.image,
-            options=[
-                QuestionOptionSchema(id=str(opt.id), text=opt.text)
-                for opt in question.question_options
-            ]
-        ))
-
-    return ExamStartResponseSchema(
-        message='Экзамен начат',
-        exam_id=new_exam.id,
-        started_at=new_exam.started_at,
-        questions=questions_response
-    )
+    await db.commit()
+
+    # Ответ склеивается из готовых JSON вопросов, без моделей pydantic.
+    # Формат совпадает с ExamStartResponseSchema
+    head = orjson.dumps({
+        'message': 'Экзамен начат',
+        'exam_id': new_exam.id,
+        'started_at': new_exam.started_at
+    }, option=orjson.OPT_UTC_Z)
+    content = b''.join((
+        head[:-1],
+        b',"questions":[',
+        # Вопрос, удалённый между двумя запросами, просто пропускается
+        b','.join(part for part in question_parts.values() if part is not None),
+        b']}'
+    ))
+    return Response(content=content, media_type='application/json', status_code=status.HTTP_201_CREATED)
 
 
 @exam_router.post('/{exam_id}/answer', response_model=ExamAnswerResponseSchema)
@@ -105,7 +135,7 @@ async def answer_question(
         exam_id: int,
         answer_data: ExamAnswerRequestSchema,
         current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ):
     """
     Ответить на вопрос экзамена
@@ -114,8 +144,9 @@ async def answer_question(
     - **question_id**: ID вопроса
     - **option_id**: ID выбранного варианта ответа
     """
-    # Проверяем существование экзамена
-    exam = db.query(Exam).filter(Exam.id == exam_id).first()
+    # Проверяем существование экзамена и блокируем строку до конца транзакции,
+    # чтобы параллельные ответы на один экзамен не перетирали счет
+    exam = await db.get(Exam, exam_id, with_for_update=True)
     if not exam:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -136,61 +167,69 @@ async def answer_question(
             detail='Экзамен уже завершен'
         )
 
-    # Проверяем существование вопроса
-    question = db.query(Question).filter(Question.id == answer_data.question_id).first()
-    if not question:
+    # Одним запросом проверяем вопрос и вариант ответа
+    row = (await db.execute(
+        select(Question.id, AnswerOption.is_correct)
+        .select_from(Question)
+        .outerjoin(AnswerOption, and_(
+            AnswerOption.question_id == Question.id,
+            AnswerOption.id == answer_data.option_id
+        ))
+        .where(Question.id == answer_data.question_id)
+    )).first()
+
+    if row is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail='Вопрос не найден'
         )
 
-    # Проверяем существование варианта ответа
-    option = db.query(AnswerOption).filter(
-        AnswerOption.id == answer_data.option_id,
-        AnswerOption.question_id == answer_data.question_id
-    ).first()
-    if not option:
+    if row.is_correct is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail='Вариант ответа не найден или не принадлежит этому вопросу'
         )
 
-    # Проверяем, не отвечал ли пользователь на этот вопрос ранее
-    existing_answer = db.query(ExamAnswer).filter(
-        ExamAnswer.exam_id == exam_id,
-        ExamAnswer.question_id == answer_data.question_id
-    ).first()
-
-    if existing_answer:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail='Вы уже ответили на этот вопрос'
-        )
-
     # Проверяем правильность ответа
-    is_correct = option.is_correct
+    is_correct = row.is_correct
 
     # Сохраняем ответ
     exam_answer = ExamAnswer(
         exam_id=exam_id,
         question_id=answer_data.question_id,
         selected_option_id=answer_data.option_id,
-        is_correct=is_correct,
-        answered_at=datetime.utcnow()
+        is_correct=is_correct
     )
 
     db.add(exam_answer)
+    # Повторный ответ отсекает уникальный индекс (exam_id, question_id)
+    try:
+        await db.flush()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Вы уже ответили на этот вопрос'
+        )
 
-    # Обновляем счет если ответ правильный
+    # Обновляем счет если ответ правильный — инкремент выполняется в БД,
+    # поэтому параллельные запросы не теряют обновления
+    current_score = exam.score
     if is_correct:
-        exam.score += 1
+        current_score = (await db.execute(
+            update(Exam)
+            .where(Exam.id == exam_id)
+            .values(score=Exam.score + 1)
+            .returning(Exam.score)
+            .execution_options(synchronize_session=False)
+        )).scalar_one()
 
-    db.commit()
+    await db.commit()
 
     return ExamAnswerResponseSchema(
         message='Ответ сохранен',
         is_correct=is_correct,
-        current_score=exam.score
+        current_score=current_score
     )
 
 
@@ -198,7 +237,7 @@ async def answer_question(
 async def finish_exam(
         exam_id: int,
         current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ):
     """
     Завершить экзамен
@@ -207,7 +246,7 @@ async def finish_exam(
 
     Подсчитывает результат и определяет, прошел ли пользователь экзамен
     """
-    exam = db.query(Exam).filter(Exam.id == exam_id).first()
+    exam = await db.get(Exam, exam_id)
 
     if not exam:
         raise HTTPException(
@@ -229,7 +268,9 @@ async def finish_exam(
         )
 
     # Подсчитываем результаты
-    total_questions = len(exam.exam_answers)
+    total_questions = (await db.execute(
+        select(func.count(ExamAnswer.id)).where(ExamAnswer.exam_id == exam_id)
+    )).scalar()
 
     # Проверяем, ответил ли пользователь на все вопросы
     if total_questions < EXAM_QUESTIONS_COUNT:
@@ -243,10 +284,12 @@ async def finish_exam(
 
     # Завершаем экзамен
     exam.status = ExamStatusChoices.completed if passed else ExamStatusChoices.failed
-    exam.finished_at = datetime.utcnow()
+    # Время ставит БД, refresh ниже подтягивает значение
+    exam.finished_at = func.now()
 
-    db.commit()
-    db.refresh(exam)
+    await db.commit()
+    await db.refresh(exam)
+    await invalidate_exam_stats(current_user.id)
 
     return ExamFinishResponseSchema(
         message='Экзамен завершен',
@@ -264,7 +307,7 @@ async def get_user_exams(
         limit: int = 20,
         offset: int = 0,
         current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ):
     """
     Получить историю экзаменов текущего пользователя
@@ -273,28 +316,30 @@ async def get_user_exams(
     - **limit**: Количество результатов
     - **offset**: Смещение для пагинации
     """
-    query = db.query(Exam).filter(Exam.user_id == current_user.id)
+    query = select(Exam).where(Exam.user_id == current_user.id)
 
     if status:
-        query = query.filter(Exam.status == status)
+        query = query.where(Exam.status == status)
 
-    exams = query.order_by(Exam.started_at.desc()).offset(offset).limit(limit).all()
+    exams = (await db.execute(
+        query.order_by(Exam.started_at.desc()).offset(offset).limit(limit)
+    )).scalars().all()
 
-    return exams
+    return [ExamSchema.from_orm_fast(exam) for exam in exams]
 
 
 @exam_router.get('/{exam_id}', response_model=ExamSchema)
 async def get_exam_detail(
         exam_id: int,
         current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ):
     """
     Получить детальную информацию об экзамене
 
     - **exam_id**: ID экзамена
     """
-    exam = db.query(Exam).filter(Exam.id == exam_id).first()
+    exam = await db.get(Exam, exam_id)
 
     if not exam:
         raise HTTPException(
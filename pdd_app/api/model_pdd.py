@@ -1,9 +1,9 @@
+import asyncio
 import os
-from fastapi import APIRouter, UploadFile, File, HTTPException
-import io
+from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks
 import torch
 import torch.nn as nn
-from torchvision import transforms
+from torchvision.transforms import v2
 from PIL import Image
 from pdd_app.db.database import SessionLocal
 from pdd_app.db.models import PddModel
@@ -47,9 +47,11 @@ class CheckImage(nn.Module):
 
 
 
-transform_data = transforms.Compose([
-    transforms.Resize((224, 224)),
-    transforms.ToTensor()
+# Ресайз идёт по uint8-тензору, во float переводим уже после
+transform_data = v2.Compose([
+    v2.PILToTensor(),
+    v2.Resize((224, 224), antialias=True),
+    v2.ToDtype(torch.float32, scale=True)
 ])
 
 
@@ -63,6 +65,15 @@ model.load_state_dict(torch.load('model_PDD (3).pth', map_location=device))
 model.to(device)
 model.eval()
 
+# На GPU считаем в FP16; half() делаем до трассировки, чтобы freeze зашил веса уже в FP16
+dtype = torch.float16 if device.type == 'cuda' else torch.float32
+model = model.to(dtype)
+if device.type == 'cpu':
+    # На CPU Linear-слои в int8; Conv2d динамическая квантизация не поддерживает
+    model = torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+with torch.no_grad():
+    model = torch.jit.freeze(torch.jit.trace(model, torch.randn(1, 3, 224, 224, device=device, dtype=dtype)))
+
 
 
 
@@ -89,35 +100,77 @@ pdd_info = {
 
 
 
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+
+# Запросы копятся в очереди до MAX_BATCH_SIZE или BATCH_WINDOW_SECONDS
+# и прогоняются через модель одним батчем
+MAX_BATCH_SIZE = 32
+BATCH_WINDOW_SECONDS = 0.005
+
+predict_queue: asyncio.Queue = asyncio.Queue()
+
+
+def _predict_batch(batch: torch.Tensor) -> list[int]:
+    with torch.inference_mode():
+        return model(batch.to(device, dtype)).argmax(dim=1).tolist()
+
+
+async def batcher_loop():
+    loop = asyncio.get_running_loop()
+    while True:
+        items = [await predict_queue.get()]
+        deadline = loop.time() + BATCH_WINDOW_SECONDS
+        while len(items) < MAX_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(predict_queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        try:
+            preds = await asyncio.to_thread(_predict_batch, torch.stack([t for t, _ in items]))
+        except Exception as e:
+            for _, fut in items:
+                if not fut.done():
+                    fut.set_exception(e)
+            continue
+
+        for (_, fut), pred in zip(items, preds):
+            # клиент мог отвалиться, пока ждал батч
+            if not fut.done():
+                fut.set_result(pred)
+
+
+async def _persist(info: dict):
+    async with SessionLocal() as db:
+        db.add(PddModel(**info))
+        await db.commit()
+
+
 @pdd_router.post('/predict/')
-async def check_image(file: UploadFile = File(...)):
+async def check_image(bg: BackgroundTasks, file: UploadFile = File(...)):
     try:
-        image_data = await file.read()
-        if not image_data:
+        if not file.size:
             raise HTTPException(status_code=400, detail='Файл не получен')
+        if file.size > MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail='Файл слишком большой')
 
-        img = Image.open(io.BytesIO(image_data)).convert("RGB")
-        img_tensor = transform_data(img).unsqueeze(0).to(device)
+        # PIL читает прямо из временного файла; draft даёт JPEG декодироваться сразу в уменьшенном масштабе
+        img = Image.open(file.file)
+        img.draft("RGB", (224, 224))
+        img = img.convert("RGB")
+        img_tensor = transform_data(img)
 
-        with torch.no_grad():
-            y_pred = model(img_tensor)
-            pred = y_pred.argmax(dim=1).item()
+        fut = asyncio.get_running_loop().create_future()
+        predict_queue.put_nowait((img_tensor, fut))
+        pred = await fut
 
         record_info = pdd_info.get(pred, {"name": "Unknown", "category": "Неизвестно", "description": ""})
 
-        db = SessionLocal()
-        try:
-            record = PddModel(
-                name=record_info["name"],
-                category=record_info["category"],
-                description=record_info["description"],
-                images="uploaded_image.png"
-            )
-            db.add(record)
-            db.commit()
-            db.refresh(record)
-        finally:
-            db.close()
+        # запись в БД уходит после отправки ответа
+        bg.add_task(_persist, record_info | {"images": ["uploaded_image.png"]})
 
         return {
             "class_id": pred,
@@ -126,5 +179,7 @@ async def check_image(file: UploadFile = File(...)):
             "description": record_info["description"]
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
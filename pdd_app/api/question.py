@@ -1,44 +1,51 @@
-from fastapi import HTTPException, Depends, APIRouter, status
-from sqlalchemy.orm import Session
+import hashlib
+
+from fastapi import HTTPException, Depends, APIRouter, Request, Response, status
+from sqlalchemy import exists, insert, select, tuple_
+from sqlalchemy.orm import aliased, selectinload, raiseload
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from datetime import datetime
 
 from pdd_app.db.models import (
-    Question, AnswerOption, Category,
-    DifficultyChoices, User, RoleChoices
+    Question, AnswerOption, Category, Comment,
+    DifficultyChoices, User
 )
 from ..db.schema import (
     QuestionCreateSchema, QuestionUpdateSchema, QuestionAdminSchema,
     AnswerOptionSchema, CategorySchema
 )
-from ..db.database import SessionLocal
-from .auth import get_current_user
+from ..db.database import get_db
+from .auth import get_current_user, get_current_admin
 
 question_router = APIRouter(prefix='/questions', tags=['Questions'])
 
+QUESTION_CACHE_CONTROL = 'private, max-age=60'
 
-async def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
+def question_cascade_loads(parent=None):
+    """
+    Загрузчики всех связей вопроса, которые ORM удаляет каскадом.
 
-def check_admin_role(current_user: User):
-    """Проверка прав администратора"""
-    if current_user.role != RoleChoices.admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail='Доступ запрещен. Требуются права администратора.'
-        )
+    Связи помечены lazy='raise_on_sql', поэтому перед db.delete их нужно загрузить явно.
+    parent — загрузчик, от которого строится цепочка (например, вопросы категории)
+    """
+    def load(attr):
+        return parent.selectinload(attr) if parent is not None else selectinload(attr)
+
+    return [
+        load(Question.question_options),
+        load(Question.question_favorites),
+        load(Question.question_comments).selectinload(Comment.comment_likes),
+        load(Question.question_likes),
+        load(Question.exam_answers),
+    ]
 
 
 @question_router.post('/', status_code=status.HTTP_201_CREATED)
 async def create_question(
         question_data: QuestionCreateSchema,
-        current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        current_user: User = Depends(get_current_admin),
+        db: AsyncSession = Depends(get_db)
 ):
     """
     Создать новый вопрос (только для администраторов)
@@ -50,12 +57,11 @@ async def create_question(
     - **image**: URL изображения (опционально)
     - **options**: Список вариантов ответов (минимум 2, только 1 правильный)
     """
-    # Проверяем права администратора
-    check_admin_role(current_user)
-
     # Проверяем существование категории
-    category = db.query(Category).filter(Category.id == question_data.category_id).first()
-    if not category:
+    category_exists = await db.scalar(
+        select(exists().where(Category.id == question_data.category_id))
+    )
+    if not category_exists:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail='Категория не найдена'
@@ -63,35 +69,28 @@ async def create_question(
 
     # Валидация вариантов ответов уже происходит в QuestionCreateSchema validator
 
-    # Создаем новый вопрос
-    new_question = Question(
-        text=question_data.text,
-        image=question_data.image,
-        explanation=question_data.explanation,
-        difficulty=question_data.difficulty,
-        category_id=question_data.category_id,
-        created_at=datetime.utcnow()
+    # Создаем новый вопрос, id возвращается тем же INSERT ... RETURNING
+    question_id = await db.scalar(
+        insert(Question)
+        .values(**question_data.model_dump(exclude={'options'}))
+        .returning(Question.id)
     )
 
-    db.add(new_question)
-    db.commit()
-    db.refresh(new_question)
-
-    # Создаем варианты ответов
-    for option_data in question_data.options:
-        answer_option = AnswerOption(
-            question_id=new_question.id,
-            text=option_data.text,
-            is_correct=option_data.is_correct
-        )
-        db.add(answer_option)
+    # Создаем варианты ответов одним INSERT, вопрос и варианты фиксируются вместе
+    await db.execute(insert(AnswerOption), [
+        {
+            'question_id': question_id,
+            'text': option_data.text,
+            'is_correct': option_data.is_correct
+        }
+        for option_data in question_data.options
+    ])
 
-    db.commit()
-    db.refresh(new_question)
+    await db.commit()
 
     return {
         'message': 'Вопрос успешно создан',
-        'question_id': new_question.id
+        'question_id': question_id
     }
 
 
@@ -101,8 +100,9 @@ async def get_questions(
         difficulty: Optional[DifficultyChoices] = None,
         limit: int = 20,
         offset: int = 0,
+        after_id: Optional[int] = None,
         current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ):
     """
     Получить список вопросов с фильтрацией
@@ -111,16 +111,30 @@ async def get_questions(
     - **difficulty**: Фильтр по сложности (easy, medium, advanced)
     - **limit**: Количество результатов
     - **offset**: Смещение для пагинации
+    - **after_id**: ID последнего вопроса предыдущей страницы (keyset-пагинация вместо offset)
     """
-    query = db.query(Question)
+    # Варианты грузятся одним батчем; любая другая ленивая загрузка упадёт сразу
+    query = select(Question).options(selectinload(Question.question_options), raiseload('*'))
 
     if category_id:
-        query = query.filter(Question.category_id == category_id)
+        query = query.where(Question.category_id == category_id)
 
     if difficulty:
-        query = query.filter(Question.difficulty == difficulty)
+        query = query.where(Question.difficulty == difficulty)
+
+    # Страница после after_id: всё, что в порядке (created_at, id) DESC идёт за ним.
+    # В отличие от OFFSET не перебирает пропущенные строки
+    if after_id:
+        last = aliased(Question)
+        query = query.where(
+            tuple_(Question.created_at, Question.id) < select(last.created_at, last.id)
+            .where(last.id == after_id)
+            .scalar_subquery()
+        )
 
-    questions = query.order_by(Question.created_at.desc()).offset(offset).limit(limit).all()
+    questions = (await db.execute(
+        query.order_by(Question.created_at.desc(), Question.id.desc()).offset(offset).limit(limit)
+    )).scalars().all()
 
     return questions
 
@@ -128,22 +142,44 @@ async def get_questions(
 @question_router.get('/{question_id}', response_model=QuestionAdminSchema)
 async def get_question_detail(
         question_id: int,
+        request: Request,
+        response: Response,
         current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ):
     """
     Получить детальную информацию о вопросе
 
     - **question_id**: ID вопроса
+
+    Отдаёт ETag; при совпадающем If-None-Match возвращает 304 без загрузки вопроса
     """
-    question = db.query(Question).filter(Question.id == question_id).first()
+    updated_at = await db.scalar(
+        select(Question.updated_at).where(Question.id == question_id)
+    )
+    if updated_at is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='Вопрос не найден'
+        )
+
+    etag = '"' + hashlib.md5(f'{question_id}:{updated_at.timestamp()}'.encode()).hexdigest() + '"'
+    headers = {'ETag': etag, 'Cache-Control': QUESTION_CACHE_CONTROL}
+    if_none_match = request.headers.get('if-none-match', '')
+    if etag in (tag.strip().removeprefix('W/') for tag in if_none_match.split(',')):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
 
+    question = await db.get(
+        Question, question_id,
+        options=[selectinload(Question.question_options), raiseload('*')]
+    )
     if not question:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail='Вопрос не найден'
         )
 
+    response.headers.update(headers)
     return question
 
 
@@ -151,8 +187,8 @@ async def get_question_detail(
 async def update_question(
         question_id: int,
         question_data: QuestionUpdateSchema,
-        current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        current_user: User = Depends(get_current_admin),
+        db: AsyncSession = Depends(get_db)
 ):
     """
     Обновить существующий вопрос (только для администраторов)
@@ -161,11 +197,8 @@ async def update_question(
     - Все поля опциональны, обновляются только переданные поля
     - Варианты ответов не обновляются через этот endpoint
     """
-    # Проверяем права администратора
-    check_admin_role(current_user)
-
     # Проверяем существование вопроса
-    question = db.query(Question).filter(Question.id == question_id).first()
+    question = await db.get(Question, question_id)
     if not question:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -174,8 +207,10 @@ async def update_question(
 
     # Если обновляется категория, проверяем её существование
     if question_data.category_id:
-        category = db.query(Category).filter(Category.id == question_data.category_id).first()
-        if not category:
+        category_exists = await db.scalar(
+            select(exists().where(Category.id == question_data.category_id))
+        )
+        if not category_exists:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail='Категория не найдена'
@@ -186,8 +221,14 @@ async def update_question(
     for field, value in update_data.items():
         setattr(question, field, value)
 
-    db.commit()
-    db.refresh(question)
+    # Присвоение тех же значений не попадает в историю атрибутов — UPDATE не нужен
+    if not db.is_modified(question):
+        return {
+            'message': 'Вопрос не изменен',
+            'question_id': question.id
+        }
+
+    await db.commit()
 
     return {
         'message': 'Вопрос успешно обновлен',
@@ -198,27 +239,24 @@ async def update_question(
 @question_router.delete('/{question_id}', status_code=status.HTTP_200_OK)
 async def delete_question(
         question_id: int,
-        current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        current_user: User = Depends(get_current_admin),
+        db: AsyncSession = Depends(get_db)
 ):
     """
     Удалить вопрос (только для администраторов)
 
     - **question_id**: ID вопроса
     """
-    # Проверяем права администратора
-    check_admin_role(current_user)
-
-    # Проверяем существование вопроса
-    question = db.query(Question).filter(Question.id == question_id).first()
+    # Проверяем существование вопроса, сразу подгружая всё, что удаляется каскадом
+    question = await db.get(Question, question_id, options=question_cascade_loads())
     if not question:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail='Вопрос не найден'
         )
 
-    db.delete(question)
-    db.commit()
+    await db.delete(question)
+    await db.commit()
 
     return {
         'message': 'Вопрос успешно удален',
@@ -1,27 +1,64 @@
 from fastapi import HTTPException, Depends, APIRouter, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from redis.exceptions import RedisError
 from pdd_app.db.models import User, Exam, ExamStatusChoices
 from ..db.schema import UserProfileSchema, UserStatusSchema, AdminUpdateUserSchema, UserUpdateSchema
-from passlib.context import CryptContext
-from ..db.database import SessionLocal
-from .auth import get_current_user
+from pdd_app.security.passwords import hash_password
+from ..db.database import get_db
+from ..db.cache import redis_client
+from .auth import get_current_user, invalidate_user_cache
 
 user_router = APIRouter(prefix='/users', tags=['Users'])
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-async def get_db():
-    db = SessionLocal()
+
+# Кешируется только статистика экзаменов, сам профиль всегда читается из БД
+EXAM_STATS_CACHE_TTL_SECONDS = 60
+
+
+def _exam_stats_cache_key(user_id: int) -> str:
+    return f"stats:{user_id}"
+
+
+async def invalidate_exam_stats(user_id: int) -> None:
+    try:
+        await redis_client.delete(_exam_stats_cache_key(user_id))
+    except RedisError:
+        pass
+
+
+async def load_exam_stats(db: AsyncSession, user_id: int) -> UserStatusSchema:
+    """Количество сданных экзаменов и средний балл одним запросом"""
+    key = _exam_stats_cache_key(user_id)
     try:
-        yield db
-    finally:
-        db.close()
+        cached = await redis_client.get(key)
+    except RedisError:
+        cached = None
+    if cached is not None:
+        return UserStatusSchema.model_validate_json(cached)
+
+    passed_exams_count, avg_score = (await db.execute(
+        select(func.count(Exam.id), func.coalesce(func.avg(Exam.score), 0.0)).where(
+            Exam.user_id == user_id,
+            Exam.status == ExamStatusChoices.completed
+        )
+    )).one()
+
+    stats = UserStatusSchema(
+        passed_exams=passed_exams_count,
+        avg_score=round(float(avg_score), 2)
+    )
+    try:
+        await redis_client.set(key, stats.model_dump_json(), ex=EXAM_STATS_CACHE_TTL_SECONDS)
+    except RedisError:
+        pass
+    return stats
 
 
 @user_router.get('/me', response_model=UserProfileSchema)
 async def get_current_user_profile(
         current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ):
     """
     Получить профиль текущего пользователя
@@ -29,43 +66,27 @@ async def get_current_user_profile(
     Возвращает информацию о пользователе и его статистику по экзаменам
     """
     # Получаем статистику экзаменов
-    passed_exams_count = db.query(func.count(Exam.id)).filter(
-        Exam.user_id == current_user.id,
-        Exam.status == ExamStatusChoices.completed
-    ).scalar()
-
-    # Средний балл
-    avg_score_result = db.query(func.avg(Exam.score)).filter(
-        Exam.user_id == current_user.id,
-        Exam.status == ExamStatusChoices.completed
-    ).scalar()
-
-    avg_score = float(avg_score_result) if avg_score_result else 0.0
-
-    stats = UserStatusSchema(
-        passed_exams=passed_exams_count or 0,
-        avg_score=round(avg_score, 2)
-    )
+    stats = await load_exam_stats(db, current_user.id)
 
     return UserProfileSchema(
         id=current_user.id,
         email=current_user.email,
         username=current_user.username,
-        stats=stats
+        status=stats
     )
 
 
 @user_router.get('/{user_id}', response_model=UserProfileSchema)
 async def get_user_profile(
         user_id: int,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ):
     """
     Получить профиль пользователя по ID
 
     - **user_id**: ID пользователя
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
 
     if not user:
         raise HTTPException(
@@ -74,28 +95,13 @@ async def get_user_profile(
         )
 
     # Получаем статистику экзаменов
-    passed_exams_count = db.query(func.count(Exam.id)).filter(
-        Exam.user_id == user_id,
-        Exam.status == ExamStatusChoices.completed
-    ).scalar()
-
-    avg_score_result = db.query(func.avg(Exam.score)).filter(
-        Exam.user_id == user_id,
-        Exam.status == ExamStatusChoices.completed
-    ).scalar()
-
-    avg_score = float(avg_score_result) if avg_score_result else 0.0
-
-    stats = UserStatusSchema(
-        passed_exams=passed_exams_count or 0,
-        avg_score=round(avg_score, 2)
-    )
+    stats = await load_exam_stats(db, user_id)
 
     return UserProfileSchema(
         id=user.id,
         email=user.email,
         username=user.username,
-        stats=stats
+        status=stats
     )
 
 
@@ -105,7 +111,7 @@ async def get_user_profile(
 async def update_current_user_profile(
     update_data: UserUpdateSchema,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Обновление профиля текущего пользователя:
@@ -124,32 +130,17 @@ async def update_current_user_profile(
     if update_data.username:
         current_user.username = update_data.username
     if update_data.password:
-        current_user.password = pwd_context.hash(update_data.password)
+        current_user.password = await hash_password(update_data.password)
 
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await invalidate_user_cache(current_user.id)
 
     # Обновляем статистику
-    passed_exams_count = db.query(func.count(Exam.id)).filter(
-        Exam.user_id == current_user.id,
-        Exam.status == ExamStatusChoices.completed
-    ).scalar()
-
-    avg_score_result = db.query(func.avg(Exam.score)).filter(
-        Exam.user_id == current_user.id,
-        Exam.status == ExamStatusChoices.completed
-    ).scalar()
-
-    avg_score = float(avg_score_result) if avg_score_result else 0.0
-
-    stats = UserStatusSchema(
-        passed_exams=passed_exams_count or 0,
-        avg_score=round(avg_score, 2)
-    )
+    stats = await load_exam_stats(db, current_user.id)
 
     return UserProfileSchema(
         id=current_user.id,
         email=current_user.email,
         username=current_user.username,
-        stats=stats
+        status=stats
     )
\ No newline at end of file
@@ -3,7 +3,12 @@ from dotenv import load_dotenv
 
 
 load_dotenv()
-SECRET_KEY = os.getenv('SECRET_KEY')
-ALGORITHM = "HS256"
+# Пара ключей Ed25519 для JWT:
+# openssl genpkey -algorithm ed25519 -out keys/jwt_private.pem
+# openssl pkey -in keys/jwt_private.pem -pubout -out keys/jwt_public.pem
+SECRET_KEY_PATH = os.getenv('SECRET_KEY_PATH', 'keys/jwt_private.pem')
+PUBLIC_KEY_PATH = os.getenv('PUBLIC_KEY_PATH', 'keys/jwt_public.pem')
+ALGORITHM = "EdDSA"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
-REFRESH_TOKEN_EXPIRE_DAYS = 3
\ No newline at end of file
+REFRESH_TOKEN_EXPIRE_DAYS = 3
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
\ No newline at end of file
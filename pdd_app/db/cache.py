@@ -0,0 +1,6 @@
+import redis.asyncio as redis
+
+from pdd_app.config import REDIS_URL
+
+
+redis_client = redis.from_url(REDIS_URL)
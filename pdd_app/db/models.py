@@ -1,8 +1,9 @@
 from .database import Base
 from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy import (
     String, Integer, DateTime, Enum, ForeignKey,
-    Text, Boolean, Float
+    Text, Boolean, Float, Index, func
 )
 from typing import Optional, List
 from datetime import datetime
@@ -10,6 +11,8 @@ from enum import Enum as PyEnum
 
 
 
+# Перечисления хранятся в БД как VARCHAR + CHECK, а не нативный ENUM Postgres:
+# новое значение — это замена CHECK, без ALTER TYPE
 class DifficultyChoices(str, PyEnum):
     easy = 'easy'
     medium = 'medium'
@@ -34,19 +37,23 @@ class User(Base):
     email: Mapped[str] = mapped_column(String, unique=True, nullable=False)
     username: Mapped[str] = mapped_column(String, unique=True, nullable=False)
     password: Mapped[str] = mapped_column(String, nullable=False)
-    role: Mapped[RoleChoices] = mapped_column(Enum(RoleChoices), default=RoleChoices.admin)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    role: Mapped[RoleChoices] = mapped_column(
+        Enum(RoleChoices, native_enum=False, create_constraint=True, length=16), default=RoleChoices.admin
+    )
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     user_token: Mapped[List['RefreshToken']] = relationship('RefreshToken', back_populates='user',
-                                                            cascade='all, delete-orphan')
-    user_exams: Mapped[List['Exam']] = relationship('Exam', back_populates='user', cascade='all, delete-orphan')
+                                                            cascade='all, delete-orphan', lazy='raise_on_sql')
+    user_exams: Mapped[List['Exam']] = relationship('Exam', back_populates='user', cascade='all, delete-orphan',
+                                                    lazy='raise_on_sql')
     user_favorites: Mapped[List['Favorite']] = relationship('Favorite', back_populates='user',
-                                                            cascade='all, delete-orphan')
+                                                            cascade='all, delete-orphan', lazy='raise_on_sql')
     user_comments: Mapped[List['Comment']] = relationship('Comment', back_populates='user',
-                                                          cascade='all, delete-orphan')
-    user_likes: Mapped[List['Like']] = relationship('Like', back_populates='user', cascade='all, delete-orphan')
+                                                          cascade='all, delete-orphan', lazy='raise_on_sql')
+    user_likes: Mapped[List['Like']] = relationship('Like', back_populates='user', cascade='all, delete-orphan',
+                                                    lazy='raise_on_sql')
     user_predictions: Mapped[List['AIPredictionLog']] = relationship('AIPredictionLog', back_populates='user',
-                                                                     cascade='all, delete-orphan')
+                                                                     cascade='all, delete-orphan', lazy='raise_on_sql')
 
 
 class RefreshToken(Base):
@@ -54,9 +61,9 @@ class RefreshToken(Base):
 
     id: Mapped[int] = mapped_column(Integer, autoincrement=True, primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey('user.id'))
-    user: Mapped[User] = relationship(User, back_populates='user_token')
-    token: Mapped[str] = mapped_column(String, nullable=False)
-    created_date: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    user: Mapped[User] = relationship(User, back_populates='user_token', lazy='raise_on_sql')
+    token: Mapped[str] = mapped_column(String, unique=True, index=True, nullable=False)
+    created_date: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
 
 class Category(Base):
@@ -65,30 +72,40 @@ class Category(Base):
     id: Mapped[int] = mapped_column(Integer, autoincrement=True, primary_key=True)
     category_name: Mapped[str] = mapped_column(String, unique=True, nullable=False)
     category_questions: Mapped[List['Question']] = relationship('Question', back_populates='category',
-                                                                cascade='all, delete-orphan')
+                                                                cascade='all, delete-orphan', lazy='raise_on_sql')
 
 
 class Question(Base):
     __tablename__ = 'question'
+    __table_args__ = (
+        Index('ix_question_category_created', 'category_id', 'created_at'),
+    )
 
     id: Mapped[int] = mapped_column(Integer, autoincrement=True, primary_key=True)
     text: Mapped[str] = mapped_column(Text, nullable=False)
     image: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     explanation: Mapped[str] = mapped_column(Text, nullable=False)
-    difficulty: Mapped[DifficultyChoices] = mapped_column(Enum(DifficultyChoices), default=DifficultyChoices.easy)
+    difficulty: Mapped[DifficultyChoices] = mapped_column(
+        Enum(DifficultyChoices, native_enum=False, create_constraint=True, length=16), default=DifficultyChoices.easy
+    )
     category_id: Mapped[int] = mapped_column(ForeignKey('category.id'))
-    category: Mapped[Category] = relationship(Category, back_populates='category_questions')
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    category: Mapped[Category] = relationship(Category, back_populates='category_questions', lazy='raise_on_sql')
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # Основа ETag в GET /questions/{id}
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
 
     question_options: Mapped[List['AnswerOption']] = relationship('AnswerOption', back_populates='question',
-                                                                  cascade='all, delete-orphan')
+                                                                  cascade='all, delete-orphan', lazy='raise_on_sql')
     question_favorites: Mapped[List['Favorite']] = relationship('Favorite', back_populates='question',
-                                                                cascade='all, delete-orphan')
+                                                                cascade='all, delete-orphan', lazy='raise_on_sql')
     question_comments: Mapped[List['Comment']] = relationship('Comment', back_populates='question',
-                                                              cascade='all, delete-orphan')
-    question_likes: Mapped[List['Like']] = relationship('Like', back_populates='question', cascade='all, delete-orphan')
+                                                              cascade='all, delete-orphan', lazy='raise_on_sql')
+    question_likes: Mapped[List['Like']] = relationship('Like', back_populates='question',
+                                                        cascade='all, delete-orphan', lazy='raise_on_sql')
     exam_answers: Mapped[List['ExamAnswer']] = relationship('ExamAnswer', back_populates='question',
-                                                            cascade='all, delete-orphan')
+                                                            cascade='all, delete-orphan', lazy='raise_on_sql')
 
 
 class AnswerOption(Base):
@@ -96,38 +113,50 @@ class AnswerOption(Base):
 
     id: Mapped[int] = mapped_column(Integer, autoincrement=True, primary_key=True)
     question_id: Mapped[int] = mapped_column(ForeignKey('question.id'))
-    question: Mapped[Question] = relationship(Question, back_populates='question_options')
+    question: Mapped[Question] = relationship(Question, back_populates='question_options', lazy='raise_on_sql')
     text: Mapped[str] = mapped_column(Text, nullable=False)
     is_correct: Mapped[bool] = mapped_column(Boolean, default=False)
 
 
 class Exam(Base):
     __tablename__ = 'exam'
+    __table_args__ = (
+        # score в INCLUDE: COUNT/AVG для статистики читаются index-only scan
+        Index('ix_exam_user_status_score', 'user_id', 'status', postgresql_include=['score']),
+        Index('ix_exam_user_started', 'user_id', 'started_at'),
+    )
 
     id: Mapped[int] = mapped_column(Integer, autoincrement=True, primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey('user.id'))
-    user: Mapped[User] = relationship(User, back_populates='user_exams')
+    user: Mapped[User] = relationship(User, back_populates='user_exams', lazy='raise_on_sql')
     score: Mapped[int] = mapped_column(Integer, default=0)
-    status: Mapped[ExamStatusChoices] = mapped_column(Enum(ExamStatusChoices), default=ExamStatusChoices.in_progress)
-    started_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
-    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    status: Mapped[ExamStatusChoices] = mapped_column(
+        Enum(ExamStatusChoices, native_enum=False, create_constraint=True, length=16),
+        default=ExamStatusChoices.in_progress
+    )
+    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
 
     exam_answers: Mapped[List['ExamAnswer']] = relationship('ExamAnswer', back_populates='exam',
-                                                            cascade='all, delete-orphan')
+                                                            cascade='all, delete-orphan', lazy='raise_on_sql')
 
 
 class ExamAnswer(Base):
     __tablename__ = 'exam_answer'
+    __table_args__ = (
+        # один ответ на вопрос в рамках экзамена
+        Index('ix_exam_answer_exam_question', 'exam_id', 'question_id', unique=True),
+    )
 
     id: Mapped[int] = mapped_column(Integer, autoincrement=True, primary_key=True)
     exam_id: Mapped[int] = mapped_column(ForeignKey('exam.id'))
-    exam: Mapped[Exam] = relationship(Exam, back_populates='exam_answers')
+    exam: Mapped[Exam] = relationship(Exam, back_populates='exam_answers', lazy='raise_on_sql')
     question_id: Mapped[int] = mapped_column(ForeignKey('question.id'))
-    question: Mapped[Question] = relationship(Question, back_populates='exam_answers')
+    question: Mapped[Question] = relationship(Question, back_populates='exam_answers', lazy='raise_on_sql')
     selected_option_id: Mapped[int] = mapped_column(ForeignKey('answer_option.id'))
-    selected_option: Mapped[AnswerOption] = relationship(AnswerOption)
+    selected_option: Mapped[AnswerOption] = relationship(AnswerOption, lazy='raise_on_sql')
     is_correct: Mapped[bool] = mapped_column(Boolean, default=False)
-    answered_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    answered_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
 
 class Video(Base):
@@ -138,11 +167,12 @@ class Video(Base):
     description: Mapped[str] = mapped_column(Text, nullable=False)
     url: Mapped[str] = mapped_column(String, nullable=False)
     views_count: Mapped[int] = mapped_column(Integer, default=0)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     video_comments: Mapped[List['Comment']] = relationship('Comment', back_populates='video',
-                                                           cascade='all, delete-orphan')
-    video_likes: Mapped[List['Like']] = relationship('Like', back_populates='video', cascade='all, delete-orphan')
+                                                           cascade='all, delete-orphan', lazy='raise_on_sql')
+    video_likes: Mapped[List['Like']] = relationship('Like', back_populates='video', cascade='all, delete-orphan',
+                                                     lazy='raise_on_sql')
 
 
 class Comment(Base):
@@ -150,16 +180,18 @@ class Comment(Base):
 
     id: Mapped[int] = mapped_column(Integer, autoincrement=True, primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey('user.id'))
-    user: Mapped[User] = relationship(User, back_populates='user_comments')
+    user: Mapped[User] = relationship(User, back_populates='user_comments', lazy='raise_on_sql')
     text: Mapped[str] = mapped_column(Text, nullable=False)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     question_id: Mapped[Optional[int]] = mapped_column(ForeignKey('question.id'), nullable=True)
-    question: Mapped[Optional[Question]] = relationship(Question, back_populates='question_comments')
+    question: Mapped[Optional[Question]] = relationship(Question, back_populates='question_comments',
+                                                        lazy='raise_on_sql')
     video_id: Mapped[Optional[int]] = mapped_column(ForeignKey('video.id'), nullable=True)
-    video: Mapped[Optional[Video]] = relationship(Video, back_populates='video_comments')
+    video: Mapped[Optional[Video]] = relationship(Video, back_populates='video_comments', lazy='raise_on_sql')
 
-    comment_likes: Mapped[List['Like']] = relationship('Like', back_populates='comment', cascade='all, delete-orphan')
+    comment_likes: Mapped[List['Like']] = relationship('Like', back_populates='comment',
+                                                       cascade='all, delete-orphan', lazy='raise_on_sql')
 
 
 class Like(Base):
@@ -167,15 +199,15 @@ class Like(Base):
 
     id: Mapped[int] = mapped_column(Integer, autoincrement=True, primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey('user.id'))
-    user: Mapped[User] = relationship(User, back_populates='user_likes')
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    user: Mapped[User] = relationship(User, back_populates='user_likes', lazy='raise_on_sql')
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     comment_id: Mapped[Optional[int]] = mapped_column(ForeignKey('comment.id'), nullable=True)
-    comment: Mapped[Optional[Comment]] = relationship(Comment, back_populates='comment_likes')
+    comment: Mapped[Optional[Comment]] = relationship(Comment, back_populates='comment_likes', lazy='raise_on_sql')
     video_id: Mapped[Optional[int]] = mapped_column(ForeignKey('video.id'), nullable=True)
-    video: Mapped[Optional[Video]] = relationship(Video, back_populates='video_likes')
+    video: Mapped[Optional[Video]] = relationship(Video, back_populates='video_likes', lazy='raise_on_sql')
     question_id: Mapped[Optional[int]] = mapped_column(ForeignKey('question.id'), nullable=True)
-    question: Mapped[Optional[Question]] = relationship(Question, back_populates='question_likes')
+    question: Mapped[Optional[Question]] = relationship(Question, back_populates='question_likes', lazy='raise_on_sql')
 
 
 class Favorite(Base):
@@ -183,10 +215,10 @@ class Favorite(Base):
 
     id: Mapped[int] = mapped_column(Integer, autoincrement=True, primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey('user.id'))
-    user: Mapped[User] = relationship(User, back_populates='user_favorites')
+    user: Mapped[User] = relationship(User, back_populates='user_favorites', lazy='raise_on_sql')
     question_id: Mapped[int] = mapped_column(ForeignKey('question.id'))
-    question: Mapped[Question] = relationship(Question, back_populates='question_favorites')
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    question: Mapped[Question] = relationship(Question, back_populates='question_favorites', lazy='raise_on_sql')
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
 
 class AIPredictionLog(Base):
@@ -194,13 +226,13 @@ class AIPredictionLog(Base):
 
     id: Mapped[int] = mapped_column(Integer, autoincrement=True, primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey('user.id'))
-    user: Mapped[User] = relationship(User, back_populates='user_predictions')
+    user: Mapped[User] = relationship(User, back_populates='user_predictions', lazy='raise_on_sql')
     image_url: Mapped[str] = mapped_column(String, nullable=False)
     predicted_label: Mapped[str] = mapped_column(String, nullable=False)
     category: Mapped[str] = mapped_column(String, nullable=False)
     description: Mapped[str] = mapped_column(Text, nullable=False)
     confidence: Mapped[float] = mapped_column(Float, nullable=False)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
 
 class PddModel(Base):
@@ -210,4 +242,4 @@ class PddModel(Base):
     name: Mapped[str] = mapped_column(String(32))
     category: Mapped[str] = mapped_column(String(32))  # новая колонка
     description: Mapped[str] = mapped_column(String(256))  # новая колонка
-    images: Mapped[List[str]] = mapped_column(String)
\ No newline at end of file
+    images: Mapped[List[str]] = mapped_column(ARRAY(String), default=list)
\ No newline at end of file
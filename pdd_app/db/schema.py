@@ -1,43 +1,83 @@
-from pydantic import BaseModel, EmailStr, Field, validator
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints, field_validator
+from typing import Annotated, Literal, Optional, List, Union
+from dataclasses import dataclass, fields, is_dataclass
 from datetime import datetime
-from enum import Enum
+from typing_extensions import TypedDict
 
 
+# Значения перечислений из models; Literal проверяется в pydantic-core простым сравнением строк
+Difficulty = Literal['easy', 'medium', 'advanced']
+ExamStatus = Literal['in_progress', 'completed', 'failed']
+Role = Literal['admin', 'user']
 
-class DifficultyChoices(str, Enum):
-    easy = 'easy'
-    medium = 'medium'
-    advanced = 'advanced'
 
+# Упрощённая проверка email: регулярка выполняется в pydantic-core, без email-validator
+EMAIL_RE = r"^[^@\s]+@[^@\s]+\.[^@\s]+$"
+Email = Annotated[str, StringConstraints(pattern=EMAIL_RE, max_length=254)]
 
-class ExamStatusChoices(str, Enum):
-    in_progress = 'in_progress'
-    completed = 'completed'
-    failed = 'failed'
+# Повторяющиеся строковые ограничения описаны один раз
+Username = Annotated[str, StringConstraints(min_length=3, max_length=50)]
+Password = Annotated[str, StringConstraints(min_length=6)]
+CategoryName = Annotated[str, StringConstraints(min_length=1, max_length=100)]
+Title = Annotated[str, StringConstraints(min_length=1, max_length=200)]
+NonEmptyText = Annotated[str, StringConstraints(min_length=1)]
+ShortName = Annotated[str, StringConstraints(max_length=32)]
+Description = Annotated[str, StringConstraints(max_length=256)]
 
+# Схемы ответов только отдаются клиенту: неизменяемые, лишние поля отбрасываются,
+# вложенные экземпляры повторно не валидируются
+RESPONSE_MODEL_CONFIG = ConfigDict(
+    from_attributes=True, frozen=True, extra='ignore', revalidate_instances='never'
+)
 
-class RoleChoices(str, Enum):
-    admin = 'admin'
-    user = 'user'
+# Входные схемы горячих эндпоинтов: никаких неявных преобразований строк
+# и проверки значений по умолчанию
+INPUT_MODEL_CONFIG = ConfigDict(
+    validate_default=False, str_strip_whitespace=False, coerce_numbers_to_str=False
+)
+
+# Редкие админские схемы обновления: валидатор строится при первом использовании
+DEFERRED_MODEL_CONFIG = ConfigDict(defer_build=True)
+
+
+class FastFromORM:
+    """
+    Сборка ответа из строки SQLAlchemy без валидации.
+
+    Только для плоских схем, чьи поля совпадают с колонками модели по имени и типу:
+    данные из БД уже корректны, model_construct просто копирует атрибуты.
+    Поля, которых нет у модели, получают значения по умолчанию.
+    Внутренние DTO-датаклассы собираются тем же способом через обычный __init__
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_orm_fast(cls, obj):
+        if is_dataclass(cls):
+            return cls(**{field.name: getattr(obj, field.name) for field in fields(cls)})
+        return cls.model_construct(**{
+            name: getattr(obj, name) for name in cls.model_fields if hasattr(obj, name)
+        })
 
 
 
 class UserCreateSchema(BaseModel):
-    email: EmailStr
-    username: str = Field(..., min_length=3, max_length=50)
-    password: str = Field(..., min_length=6)
+    email: Email
+    username: Username
+    password: Password
 
+    model_config = INPUT_MODEL_CONFIG
 
-class UserSchema(BaseModel):
+
+class UserSchema(FastFromORM, BaseModel):
     id: int
     email: str
     username: str
-    role: RoleChoices
+    role: Role
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = RESPONSE_MODEL_CONFIG
 
 
 class UserStatusSchema(BaseModel):
@@ -51,44 +91,48 @@ class UserProfileSchema(BaseModel):
     username: str
     status: UserStatusSchema
 
-    class Config:
-        from_attributes = True
+    model_config = RESPONSE_MODEL_CONFIG
 
 
 class UserLoginSchema(BaseModel):
-    email: EmailStr
+    email: Email
     password: str
 
+    model_config = INPUT_MODEL_CONFIG
+
 
 class UserUpdateSchema(BaseModel):
-    email: EmailStr | None = None
-    username: str | None = Field(None, min_length=3, max_length=50)
-    password: str | None = Field(None, min_length=6)
+    email: Email | None = None
+    username: Username | None = None
+    password: Password | None = None
 
 class AdminUpdateUserSchema(BaseModel):
-    email: Optional[str] = None
-    username: Optional[str] = None
-    password: Optional[str] = None
-    role: Optional[RoleChoices] = None
+    email: str | None = None
+    username: str | None = None
+    password: str | None = None
+    role: Role | None = None
+
+    model_config = DEFERRED_MODEL_CONFIG
 
-class UserRegisterResponseSchema(BaseModel):
+class UserRegisterResponseSchema(FastFromORM, BaseModel):
     id: int
     email: str
     username: str
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = RESPONSE_MODEL_CONFIG
 
 
 
-class TokenSchema(BaseModel):
+# Ответы auth только отдаются клиенту, поэтому это TypedDict, а не BaseModel.
+# RefreshTokenRequestSchema приходит от пользователя и остаётся моделью
+class TokenSchema(TypedDict):
     access_token: str
     refresh_token: str
-    token_type: str = "Bearer"
+    token_type: str
 
 
-class AccessTokenSchema(BaseModel):
+class AccessTokenSchema(TypedDict):
     access_token: str
 
 
@@ -96,36 +140,35 @@ class RefreshTokenRequestSchema(BaseModel):
     refresh_token: str
 
 
-class LogoutResponseSchema(BaseModel):
+class LogoutResponseSchema(TypedDict):
     message: str
 
 
 
-class RefreshTokenSchema(BaseModel):
+# Внутренние DTO, которые не уходят в HTTP-ответы: JSON-схема и валидация им не нужны,
+# поэтому это неизменяемые датаклассы со __slots__, а не BaseModel
+@dataclass(frozen=True, slots=True)
+class RefreshTokenSchema(FastFromORM):
     id: int
     user_id: int
     token: str
     created_date: datetime
 
-    class Config:
-        from_attributes = True
-
 
 
 class CategoryCreateSchema(BaseModel):
-    category_name: str = Field(..., min_length=1, max_length=100)
+    category_name: CategoryName
 
 
 class CategoryUpdateSchema(BaseModel):
-    category_name: str = Field(..., min_length=1, max_length=100)
+    category_name: CategoryName
 
 
-class CategorySchema(BaseModel):
+class CategorySchema(FastFromORM, BaseModel):
     id: int
     category_name: str
 
-    class Config:
-        from_attributes = True
+    model_config = RESPONSE_MODEL_CONFIG
 
 
 
@@ -134,57 +177,60 @@ class AnswerOptionCreateSchema(BaseModel):
     is_correct: bool = False
 
 
-class AnswerOptionSchema(BaseModel):
+class AnswerOptionSchema(FastFromORM, BaseModel):
     id: int
     text: str
     is_correct: bool
 
-    class Config:
-        from_attributes = True
+    model_config = RESPONSE_MODEL_CONFIG
 
 
-class AnswerOptionResponseSchema(BaseModel):
+class AnswerOptionResponseSchema(TypedDict):
     id: str
     text: str
 
-    class Config:
-        from_attributes = True
-
 
 
 class QuestionCreateSchema(BaseModel):
     text: str
     image: Optional[str] = None
     explanation: str
-    difficulty: DifficultyChoices = DifficultyChoices.easy
+    difficulty: Difficulty = 'easy'
     category_id: int
     options: List[AnswerOptionCreateSchema]
 
-    @validator('options')
+    @field_validator('options')
+    @classmethod
     def validate_options(cls, v):
         if len(v) < 2:
             raise ValueError('Вопрос должен содержать минимум 2 варианта ответа')
-        correct_count = sum(1 for option in v if option.is_correct)
+        # Второй правильный ответ отклоняем сразу, не досматривая список
+        correct_count = 0
+        for option in v:
+            if option.is_correct:
+                correct_count += 1
+                if correct_count > 1:
+                    raise ValueError('Должен быть только один правильный ответ')
         if correct_count != 1:
             raise ValueError('Должен быть только один правильный ответ')
         return v
 
 
 class QuestionUpdateSchema(BaseModel):
-    text: Optional[str] = None
-    image: Optional[str] = None
-    explanation: Optional[str] = None
-    difficulty: Optional[DifficultyChoices] = None
-    category_id: Optional[int] = None
+    text: str | None = None
+    image: str | None = None
+    explanation: str | None = None
+    difficulty: Difficulty | None = None
+    category_id: int | None = None
+
+    model_config = DEFERRED_MODEL_CONFIG
 
 
-class QuestionOptionSchema(BaseModel):
+# Варианты ответа в выдаче экзамена — обычные dict, без модели на каждый вариант
+class QuestionOptionSchema(TypedDict):
     id: str
     text: str
 
-    class Config:
-        from_attributes = True
-
 
 class QuestionSchema(BaseModel):
     id: str
@@ -192,8 +238,7 @@ class QuestionSchema(BaseModel):
     image: Optional[str]
     options: List[QuestionOptionSchema]
 
-    class Config:
-        from_attributes = True
+    model_config = RESPONSE_MODEL_CONFIG
 
 
 class QuestionDetailSchema(BaseModel):
@@ -202,8 +247,7 @@ class QuestionDetailSchema(BaseModel):
     explanation: str
     correct_option_id: str
 
-    class Config:
-        from_attributes = True
+    model_config = RESPONSE_MODEL_CONFIG
 
 
 class QuestionListResponseSchema(BaseModel):
@@ -215,13 +259,12 @@ class QuestionAdminSchema(BaseModel):
     text: str
     image: Optional[str]
     explanation: str
-    difficulty: DifficultyChoices
+    difficulty: Difficulty
     category_id: int
     created_at: datetime
-    options: List[AnswerOptionSchema]
+    options: List[AnswerOptionSchema] = Field(validation_alias='question_options')
 
-    class Config:
-        from_attributes = True
+    model_config = RESPONSE_MODEL_CONFIG
 
 
 
@@ -229,16 +272,15 @@ class ExamStartRequestSchema(BaseModel):
     user_id: int
 
 
-class ExamSchema(BaseModel):
+class ExamSchema(FastFromORM, BaseModel):
     id: int
     user_id: int
     score: int
-    status: ExamStatusChoices
+    status: ExamStatus
     started_at: datetime
     finished_at: Optional[datetime]
 
-    class Config:
-        from_attributes = True
+    model_config = RESPONSE_MODEL_CONFIG
 
 
 class ExamStartResponseSchema(BaseModel):
@@ -252,6 +294,8 @@ class ExamAnswerRequestSchema(BaseModel):
     question_id: int
     option_id: int
 
+    model_config = INPUT_MODEL_CONFIG
+
 
 class ExamAnswerResponseSchema(BaseModel):
     message: str
@@ -269,7 +313,8 @@ class ExamFinishResponseSchema(BaseModel):
 
 
 
-class ExamAnswerSchema(BaseModel):
+@dataclass(frozen=True, slots=True)
+class ExamAnswerSchema(FastFromORM):
     id: int
     exam_id: int
     question_id: int
@@ -277,24 +322,23 @@ class ExamAnswerSchema(BaseModel):
     is_correct: bool
     answered_at: datetime
 
-    class Config:
-        from_attributes = True
-
 
 
 class VideoCreateSchema(BaseModel):
-    title: str = Field(..., min_length=1, max_length=200)
+    title: Title
     description: str
     url: str
 
 
 class VideoUpdateSchema(BaseModel):
-    title: Optional[str] = Field(None, min_length=1, max_length=200)
-    description: Optional[str] = None
-    url: Optional[str] = None
+    title: Title | None = None
+    description: str | None = None
+    url: str | None = None
 
+    model_config = DEFERRED_MODEL_CONFIG
 
-class VideoSchema(BaseModel):
+
+class VideoSchema(FastFromORM, BaseModel):
     id: int
     title: str
     description: str
@@ -302,31 +346,39 @@ class VideoSchema(BaseModel):
     views_count: int
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = RESPONSE_MODEL_CONFIG
 
 
 
-class CommentCreateSchema(BaseModel):
-    text: str = Field(..., min_length=1)
-    question_id: Optional[int] = None
-    video_id: Optional[int] = None
+# Цель комментария/лайка выбирается по полю kind: pydantic-core сразу берёт нужный вариант,
+# а лишние id запрещены через extra='forbid'
+TARGET_INPUT_CONFIG = ConfigDict(**INPUT_MODEL_CONFIG, extra='forbid')
 
-    @validator('video_id')
-    def validate_target(cls, v, values):
-        question_id = values.get('question_id')
-        if question_id is None and v is None:
-            raise ValueError('Необходимо указать question_id или video_id')
-        if question_id is not None and v is not None:
-            raise ValueError('Можно указать только question_id или video_id, но не оба')
-        return v
+
+class CommentOnQuestion(BaseModel):
+    kind: Literal['question']
+    text: NonEmptyText
+    question_id: int
+
+    model_config = TARGET_INPUT_CONFIG
+
+
+class CommentOnVideo(BaseModel):
+    kind: Literal['video']
+    text: NonEmptyText
+    video_id: int
+
+    model_config = TARGET_INPUT_CONFIG
+
+
+CommentCreateSchema = Annotated[Union[CommentOnQuestion, CommentOnVideo], Field(discriminator='kind')]
 
 
 class CommentUpdateSchema(BaseModel):
-    text: str = Field(..., min_length=1)
+    text: NonEmptyText
 
 
-class CommentSchema(BaseModel):
+class CommentSchema(FastFromORM, BaseModel):
     id: int
     user_id: int
     text: str
@@ -335,27 +387,35 @@ class CommentSchema(BaseModel):
     video_id: Optional[int]
     likes_count: int = 0
 
-    class Config:
-        from_attributes = True
+    model_config = RESPONSE_MODEL_CONFIG
 
 
 
-class LikeCreateSchema(BaseModel):
-    comment_id: Optional[int] = None
-    video_id: Optional[int] = None
-    question_id: Optional[int] = None
+class LikeOnComment(BaseModel):
+    kind: Literal['comment']
+    comment_id: int
+
+    model_config = TARGET_INPUT_CONFIG
+
+
+class LikeOnVideo(BaseModel):
+    kind: Literal['video']
+    video_id: int
+
+    model_config = TARGET_INPUT_CONFIG
 
-    @validator('question_id')
-    def validate_target(cls, v, values):
-        comment_id = values.get('comment_id')
-        video_id = values.get('video_id')
-        targets = [comment_id, video_id, v]
-        if sum(x is not None for x in targets) != 1:
-            raise ValueError('Необходимо указать только один из: comment_id, video_id или question_id')
-        return v
+
+class LikeOnQuestion(BaseModel):
+    kind: Literal['question']
+    question_id: int
+
+    model_config = TARGET_INPUT_CONFIG
+
+
+LikeCreateSchema = Annotated[Union[LikeOnComment, LikeOnVideo, LikeOnQuestion], Field(discriminator='kind')]
 
 
-class LikeSchema(BaseModel):
+class LikeSchema(FastFromORM, BaseModel):
     id: int
     user_id: int
     created_at: datetime
@@ -363,8 +423,7 @@ class LikeSchema(BaseModel):
     video_id: Optional[int]
     question_id: Optional[int]
 
-    class Config:
-        from_attributes = True
+    model_config = RESPONSE_MODEL_CONFIG
 
 
 class LikeResponseSchema(BaseModel):
@@ -377,14 +436,13 @@ class FavoriteCreateSchema(BaseModel):
     question_id: int
 
 
-class FavoriteSchema(BaseModel):
+class FavoriteSchema(FastFromORM, BaseModel):
     id: int
     user_id: int
     question_id: int
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = RESPONSE_MODEL_CONFIG
 
 
 class FavoriteResponseSchema(BaseModel):
@@ -396,8 +454,7 @@ class FavoriteQuestionSchema(BaseModel):
     question: QuestionSchema
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = RESPONSE_MODEL_CONFIG
 
 
 
@@ -409,10 +466,12 @@ class AIPredictionResponseSchema(BaseModel):
     label: str
     category: str
     description: str
-    confidence: float = Field(..., ge=0.0, le=1.0)
+    # Уверенность модели в процентах, целое 0..100
+    confidence_pct: Annotated[int, Field(ge=0, le=100)]
 
 
-class AIPredictionLogSchema(BaseModel):
+@dataclass(frozen=True, slots=True)
+class AIPredictionLogSchema(FastFromORM):
     id: int
     user_id: int
     image_url: str
@@ -422,34 +481,32 @@ class AIPredictionLogSchema(BaseModel):
     confidence: float
     created_at: datetime
 
-    class Config:
-        from_attributes = True
-
 
 
 class PddModelCreateSchema(BaseModel):
-    name: str = Field(..., max_length=32)
-    category: str = Field(..., max_length=32)
-    description: str = Field(..., max_length=256)
-    images: str
+    name: ShortName
+    category: ShortName
+    description: Description
+    images: List[str]
 
 
 class PddModelUpdateSchema(BaseModel):
-    name: Optional[str] = Field(None, max_length=32)
-    category: Optional[str] = Field(None, max_length=32)
-    description: Optional[str] = Field(None, max_length=256)
-    images: Optional[str] = None
+    name: ShortName | None = None
+    category: ShortName | None = None
+    description: Description | None = None
+    images: List[str] | None = None
+
+    model_config = DEFERRED_MODEL_CONFIG
 
 
-class PddModelSchema(BaseModel):
+class PddModelSchema(FastFromORM, BaseModel):
     id: int
     name: str
     category: str
     description: str
-    images: str
+    images: List[str]
 
-    class Config:
-        from_attributes = True
+    model_config = RESPONSE_MODEL_CONFIG
 
 
 
@@ -458,4 +515,13 @@ class ErrorSchema(BaseModel):
 
 
 class ValidationErrorSchema(BaseModel):
-    detail: str
\ No newline at end of file
+    detail: str
+
+
+# Недостроенные схемы (например, с отложенными ссылками) собираются при импорте,
+# а не на первом запросе. Холодные схемы с DEFERRED_MODEL_CONFIG остаются отложенными
+for _schema in list(globals().values()):
+    if (isinstance(_schema, type) and issubclass(_schema, BaseModel) and _schema is not BaseModel
+            and not _schema.model_config.get('defer_build')):
+        _schema.model_rebuild()
+del _schema
@@ -0,0 +1,26 @@
+import asyncio
+
+from passlib.context import CryptContext
+
+
+# Единый контекст для всего приложения
+# Новые хеши — argon2id; bcrypt остаётся только для проверки старых хешей, при входе они перехешируются
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    default="argon2",
+    argon2__type="ID",
+    argon2__time_cost=2,
+    argon2__memory_cost=65536,
+    argon2__parallelism=1,
+    bcrypt__rounds=12,
+    deprecated="auto"
+)
+
+
+# Хеширование занимает CPU на десятки миллисекунд, поэтому уходит в поток и не блокирует event loop
+async def hash_password(password: str) -> str:
+    return await asyncio.to_thread(pwd_context.hash, password)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await asyncio.to_thread(pwd_context.verify, plain_password, hashed_password)